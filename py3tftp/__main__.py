@@ -1,28 +1,63 @@
 import logging
 import asyncio
+import os
+import signal
 
 from .protocols import TFTPServerProtocol
 from .cli_parser import parse_cli_arguments
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-def main():
-    args = parse_cli_arguments()
 
-    logging.info('Starting TFTP server on {addr}:{port}'.format(
-        addr=args.host, port=args.port))
+def shutdown(loop):
+    logging.info('Received signal, shutting down')
+    loop.stop()
 
-    timeouts = {
-        bytes(k, encoding='ascii'): v
-        for k, v in vars(args).items() if 'timeout' in k
-    }
-    loop = asyncio.get_event_loop()
+
+def watch_parent(loop, parent_pid, interval=1.0):
+    """
+    Stops a worker's loop once the process that forked it is gone, so that
+    workers never outlive the server that started them.
+    """
+    if os.getppid() != parent_pid:
+        logging.info('Parent process exited, shutting down')
+        loop.stop()
+        return
+    loop.call_later(interval, watch_parent, loop, parent_pid, interval)
+
+
+def stop_workers(workers):
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for pid in workers:
+        os.waitpid(pid, 0)
+
+
+def serve(args, extra_opts, parent_pid=None):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
 
     listen = loop.create_datagram_endpoint(
-        lambda: TFTPServerProtocol(args.host, loop, timeouts),
-        local_addr=(args.host, args.port,))
+        lambda: TFTPServerProtocol(args.host, loop, extra_opts),
+        local_addr=(args.host, args.port,),
+        reuse_port=args.workers > 1)
 
     transport, protocol = loop.run_until_complete(listen)
 
+    try:
+        loop.add_signal_handler(signal.SIGTERM, shutdown, loop)
+    except NotImplementedError:
+        # Windows event loops do not support signal handlers.
+        pass
+    if parent_pid is not None:
+        watch_parent(loop, parent_pid)
+
     try:
         loop.run_forever()
     except KeyboardInterrupt:
@@ -32,5 +67,40 @@ def main():
     loop.close()
 
 
+def main():
+    args = parse_cli_arguments()
+
+    logging.info('Starting TFTP server on {addr}:{port}'.format(
+        addr=args.host, port=args.port))
+
+    extra_opts = {
+        bytes(k, encoding='ascii'): v
+        for k, v in vars(args).items()
+        if 'timeout' in k or k in ('rcvbuf', 'sndbuf')
+    }
+
+    if uvloop is not None:
+        # libuv-based loop with much lower per-datagram overhead.
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logging.info('Using uvloop event loop')
+
+    # Every worker binds the same port with SO_REUSEPORT and the kernel
+    # spreads incoming requests between them. Transfers run on their own
+    # sockets, so workers share no state.
+    parent_pid = os.getpid()
+    workers = []
+    for _ in range(args.workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            serve(args, extra_opts, parent_pid)
+            return
+        workers.append(pid)
+
+    try:
+        serve(args, extra_opts)
+    finally:
+        stop_workers(workers)
+
+
 if __name__ == '__main__':
     main()
@@ -1,5 +1,7 @@
 import argparse
 import logging
+import os
+import socket
 from sys import exit
 
 from py3tftp import __version__
@@ -46,6 +48,25 @@ def parse_cli_arguments():
         type=float,
         help=('Timeout before the server gives up on a transfer and closes '
               'the connection. Default: 3.'))
+    parser.add_argument(
+        '--rcvbuf',
+        default=12582912,
+        type=int,
+        help=('Size of the kernel receive buffer requested for each socket. '
+              'Capped by net.core.rmem_max. Default: 12582912.'))
+    parser.add_argument(
+        '--sndbuf',
+        default=12582912,
+        type=int,
+        help=('Size of the kernel send buffer requested for each socket. '
+              'Capped by net.core.wmem_max. Default: 12582912.'))
+    parser.add_argument(
+        '-w',
+        '--workers',
+        default=1,
+        type=int,
+        help=('Number of server processes sharing the listening port via '
+              'SO_REUSEPORT. Default: 1.'))
     parser.add_argument('-l', '--file-log', help='Append output to log file.')
     parser.add_argument('-v',
                         '--verbose',
@@ -55,6 +76,12 @@ def parse_cli_arguments():
 
     args = parser.parse_args()
 
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.workers > 1 and not (hasattr(os, 'fork')
+                                 and hasattr(socket, 'SO_REUSEPORT')):
+        parser.error('--workers requires fork() and SO_REUSEPORT')
+
     if args.verbose:
         logging_config['level'] = logging.DEBUG
 
@@ -5,32 +5,28 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# The server never changes directories, so look the cwd up only once.
+_CWD = os.getcwd()
+_CWD_PREFIX = os.path.join(_CWD, '')
+
 
 def sanitize_fname(fname):
     """
     Ensures that fname is a path under the current working directory.
     """
     # Remove root (/) and parent (..) directory references.
-    path = os.fsdecode(fname).lstrip('./')
-    abs_path = Path.cwd() / path
+    path = os.path.normpath(
+        os.path.join(_CWD, os.fsdecode(fname).lstrip('./')))
 
     # Verify that the formed path is under the current working directory.
-    try:
-        logger.info('ABS PATH:')
-        logger.info(abs_path)
-        logger.info(Path.cwd())
-        abs_path.relative_to(Path.cwd())
-    except ValueError:
-        logger.info('VAUAERFSDF')
+    if path != _CWD and not path.startswith(_CWD_PREFIX):
         raise FileNotFoundError
 
     # Verify that we are not accesing a reserved file.
-    if abs_path.is_reserved():
-        logger.info('RESRVERD:')
-        logger.info(abs_path)
+    if os.name == 'nt' and Path(path).is_reserved():
         raise FileNotFoundError
 
-    return abs_path
+    return path
 
 
 class FileReader(object):
@@ -39,7 +35,10 @@ class FileReader(object):
     - read_chunk - for closing the file when bytes read is
       less than chunk_size.
     - finished - for easier notifications
+    - close - for releasing the file early
     interfaces.
+    Binary chunks are read with pread into a buffer owned by the reader,
+    so a returned chunk is only valid until the next read_chunk call.
     When it goes out of scope, it ensures the file is closed.
     """
     def __init__(self, fname, chunk_size=0, mode=None):
@@ -49,24 +48,50 @@ class FileReader(object):
         # logging.info('Class FNAME: ')
         # logging.info(self.fname)
         self.chunk_size = chunk_size
-        self._f = self._open_file()
+        # Binary chunks never go through a Python-level read buffer.
+        self._f = self._open_file(-1 if mode == b'netascii' else 0)
+        self._size = os.fstat(self._f.fileno()).st_size
+        self._fd = None
+        self._offset = 0
+        self._buf = bytearray()
+        self._view = memoryview(self._buf)
         self.finished = False
 
         if mode == b'netascii':
             self._f = Netascii(self._f)
-
-    def _open_file(self):
-        return self.fname.open('rb')
+        elif hasattr(os, 'pread'):
+            # Binary transfers need no transformation, so read chunks
+            # straight into a reusable buffer and skip the BufferedReader
+            # copy. The file is not memory mapped: if it were truncated
+            # while being served, touching the lost pages would raise
+            # SIGBUS and take every session down with it.
+            self._fd = self._f.fileno()
+            self._advise_sequential()
+
+    def _open_file(self, buffering=-1):
+        return open(self.fname, 'rb', buffering=buffering)
+
+    def _advise_sequential(self):
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            # Advice is optional; some filesystems do not support it.
+            pass
 
     def file_size(self):
-        return self.fname.stat().st_size
+        return self._size
 
     def read_chunk(self, size=None):
         size = size or self.chunk_size
         if self.finished:
             return b''
 
-        data = self._f.read(size)
+        if self._fd is not None:
+            data = self._read_into_buffer(size)
+        else:
+            data = self._f.read(size)
 
         if not data or (size > 0 and len(data) < size):
             self._f.close()
@@ -74,16 +99,40 @@ class FileReader(object):
 
         return data
 
-    def __del__(self):
+    def _read_into_buffer(self, size):
+        """
+        Reads up to size bytes at the current offset into the reusable
+        block buffer, growing it if a larger chunk is requested.
+        """
+        if size > len(self._buf):
+            self._buf = bytearray(size)
+            self._view = memoryview(self._buf)
+
+        view = self._view[:size]
+        if hasattr(os, 'preadv'):
+            read = os.preadv(self._fd, [view], self._offset)
+        else:
+            data = os.pread(self._fd, size, self._offset)
+            read = len(data)
+            view[:read] = data
+        self._offset += read
+
+        return view[:read]
+
+    def close(self):
         if self._f and not self._f.closed:
             self._f.close()
 
+    def __del__(self):
+        self.close()
+
 
 class FileWriter(object):
     """
     Wrapper around a regular file that implements:
     - write_chunk - for closing the file when bytes written
       is less than chunk_size.
+    - finished - set once the last chunk has been written.
     When it goes out of scope, it ensures the file is closed.
     """
     def __init__(self, fname, chunk_size, mode=None):
@@ -91,12 +140,13 @@ class FileWriter(object):
         self.fname = sanitize_fname(fname)
         self.chunk_size = chunk_size
         self._f = self._open_file()
+        self.finished = False
 
         if mode == b'netascii':
             self._f = Netascii(self._f)
 
     def _open_file(self):
-        return self.fname.open('xb')
+        return open(self.fname, 'xb')
 
     def _flush(self):
         if self._f:
@@ -107,9 +157,13 @@ class FileWriter(object):
 
         if not data or len(data) < self.chunk_size:
             self._f.close()
+            self.finished = True
 
         return bytes_written
 
-    def __del__(self):
+    def close(self):
         if self._f and not self._f.closed:
             self._f.close()
+
+    def __del__(self):
+        self.close()
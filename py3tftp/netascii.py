@@ -12,6 +12,21 @@ else:
     NL = os.linesep.encode("ascii")
 
 
+def _chained_replace(*pairs):
+    """
+    Applies each (old, new) replacement in turn with bytes.replace, which
+    runs in C. Only equivalent to _multiple_replace when no replacement can
+    produce a match for a later one, as is the case for LF line endings.
+    """
+    @staticmethod
+    def _prototype(data):
+        data = bytes(data)
+        for old, new in pairs:
+            data = data.replace(old, new)
+        return data
+    return _prototype
+
+
 def _multiple_replace(adict):
     rx = re.compile(b'|'.join(map(re.escape, adict)))
 
@@ -22,8 +37,12 @@ def _multiple_replace(adict):
 
 
 class Netascii:
-    from_netascii = _multiple_replace({CRLF: NL, CRNUL: CR})
-    to_netascii = _multiple_replace({NL: CRLF, CR: CRNUL})
+    if NL == LF:
+        from_netascii = _chained_replace((CRLF, LF), (CRNUL, CR))
+        to_netascii = _chained_replace((CR, CRNUL), (LF, CRLF))
+    else:
+        from_netascii = _multiple_replace({CRLF: NL, CRNUL: CR})
+        to_netascii = _multiple_replace({NL: CRLF, CR: CRNUL})
 
     def __init__(self, reader):
         self._reader = reader
@@ -39,6 +58,9 @@ class Netascii:
         return data[:size]
 
     def write(self, data):
+        # DAT payloads arrive as memoryviews, which cannot be concatenated
+        # with a CR held back from the previous block.
+        data = bytes(data)
         if self._buffer:
             data = self._buffer + data
             self._buffer = b''
@@ -1,18 +1,70 @@
 import asyncio
 import logging
+import os
+import socket
 
 from py3tftp import file_io
 from py3tftp import tftp_parsing
+from py3tftp import udp_batch
 from py3tftp.exceptions import ProtocolException
-from py3tftp.tftp_packet import TFTPPacketFactory
+from py3tftp.tftp_packet import TFTPDatPacket, TFTPPacketFactory
 
 from dhcp_leases import DhcpLeases
-import binascii
 
 logger = logging.getLogger(__name__)
 
 LEASE_PATH = '/data/dhcpd.leases'
 
+# Client IP -> hijacked filename, rebuilt whenever LEASE_PATH changes.
+_LEASE_CACHE = {'mtime': None, 'by_ip': {}}
+
+
+def leased_fnames():
+    """
+    Maps the IP of every lease in LEASE_PATH that carries a circuit id to the
+    config filename served to it. The leases file is only re-parsed when its
+    mtime changes; a missing leases file maps no clients.
+    """
+    try:
+        mtime = os.stat(LEASE_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if mtime != _LEASE_CACHE['mtime']:
+        by_ip = {}
+        if mtime is not None:
+            for lease in DhcpLeases(LEASE_PATH).get():
+                id_str = (lease.options.get('agent.circuit-id')
+                          or lease.sets.get('circuit-id')
+                          or lease.sets.get('circuit-id-alt'))
+                if id_str:
+                    by_ip.setdefault(lease.ip,
+                                     (id_str + '.cfg').encode('utf8'))
+        _LEASE_CACHE['mtime'] = mtime
+        _LEASE_CACHE['by_ip'] = by_ip
+
+    return _LEASE_CACHE['by_ip']
+
+
+def set_socket_buffers(sock, rcvbuf=None, sndbuf=None):
+    """
+    Requests larger kernel receive/send buffers for sock and logs the sizes
+    actually granted. Linux caps them at the net.core.rmem_max and
+    net.core.wmem_max sysctls, so raise those (eg. to 12582912) as well.
+    """
+    for name, opt, size in (('rcvbuf', socket.SO_RCVBUF, rcvbuf),
+                            ('sndbuf', socket.SO_SNDBUF, sndbuf)):
+        if not size:
+            continue
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opt, size)
+        except OSError as e:
+            logger.warning('Could not set %s to %d: %s', name, size, e)
+            continue
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Requested %s of %d, got %d', name, size,
+                         sock.getsockopt(socket.SOL_SOCKET, opt))
+
 
 class BaseTFTPProtocol(asyncio.DatagramProtocol):
     supported_opts = {
@@ -41,6 +93,7 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         self.file_handler = None
         self.finished = False
         self.retransmits = []
+        self.sock_fd = None
 
     def datagram_received(self, data, addr):
         """
@@ -57,7 +110,8 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
 
     def next_datagram(self):
         """
-        Returns the next datagram to be sent to self.remote_addr.
+        Returns the next datagram to be sent to self.remote_addr, as a
+        bytes-like object ready for the transport.
         """
         raise NotImplementedError
 
@@ -66,6 +120,12 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         Triggers connection initialization at the beginning of a connection.
         """
         self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            set_socket_buffers(sock, self.extra_opts.get(b'rcvbuf'),
+                               self.extra_opts.get(b'sndbuf'))
+            if udp_batch.available:
+                self.sock_fd = sock.fileno()
         self.handle_initialization()
 
     def handle_initialization(self):
@@ -74,66 +134,43 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         access the requested file - and handles possible file errors - as well
         as handling option negotiation (if applicable).
         """
-        logger.debug('Initializing file transfer to {addr}'.format(
-            addr=self.remote_addr))
+        logger.debug('Initializing file transfer to %s', self.remote_addr)
         try:
             self.set_proto_attributes()
             self.initialize_transfer()
 
             if self.r_opts:
                 self.counter = 0
-                pkt = self.packet_factory.create_packet('OCK',
-                                                        r_opts=self.r_opts)
+                datagram = self.packet_factory.create_packet(
+                    'OCK', r_opts=self.r_opts).to_bytes()
             else:
-                pkt = self.next_datagram()
+                datagram = self.next_datagram()
         except FileExistsError:
             logger.error('"{}" already exists! Cannot overwrite'.format(
                 self.filename))
-            pkt = self.packet_factory.err_file_exists()
+            err_pkt = self.packet_factory.err_file_exists()
         except PermissionError:
             logger.error('Insufficient permissions to operate on "{}"'.format(
                 self.filename))
-            pkt = self.packet_factory.err_access_violation()
+            err_pkt = self.packet_factory.err_access_violation()
         except FileNotFoundError:
             logger.error('File "{}" does not exist!'.format(self.filename))
-            pkt = self.packet_factory.err_file_not_found()
-
-        logger.debug('opening pkt: {}'.format(pkt))
-        self.send_opening_packet(pkt.to_bytes())
+            err_pkt = self.packet_factory.err_file_not_found()
+        else:
+            logger.debug('opening datagram: %s', datagram)
+            self.send_opening_packet(datagram)
+            return
 
-        if pkt.is_err():
-            self.handle_err_pkt()
+        logger.debug('opening pkt: %s', err_pkt)
+        self.send_opening_packet(err_pkt.to_bytes())
+        self.handle_err_pkt()
 
     def hijack_fname(self, fname):
-        logging.info('Starting Hijack of request for:')
-        logging.info(fname)
-        leases = DhcpLeases(LEASE_PATH)
-        for lease in leases.get():
-            print(str(lease.sets))
-            id_str = lease.options.get('agent.circuit-id') or lease.sets.get(
-                'circuit-id', None) or lease.sets.get('circuit-id-alt', None)
-
-            if not id_str:
-                logging.info(
-                    "Can't find a circuit or subscriber-id for this request, aborting"
-                )
-                return fname
-
-            print('Got ID Str:\n')
-            print(id_str)
-
-            circuit_id_str = ''.join(id_str.split(':')[2:])
-            circuit_id = binascii.unhexlify(circuit_id_str).decode('ascii')
-            logger.info('Requesting IP: ' + self.remote_addr[0])
-            logger.info('Found a lease for:' + lease.ip)
-            # if self.remote_addr[0] == '127.0.0.1':
-            if self.remote_addr[0] == lease.ip:
-                # or self.remote_addr[
-                #        0] == '172.26.84.253':
-                filename = id_str + '.cfg'
-                logger.info('Serving filename: ' + filename)
-                return filename.encode('utf8')
-        return fname
+        """
+        Replaces the requested filename with the config file named after the
+        circuit id of the client's DHCP lease, if it has one.
+        """
+        return leased_fnames().get(self.remote_addr[0], fname)
 
     def set_proto_attributes(self):
         """
@@ -144,8 +181,7 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         self.filename = self.hijack_fname(self.packet.fname)
         self.r_opts = self.packet.r_opts
         self.opts = {**self.default_opts, **self.extra_opts, **self.r_opts}
-        logger.debug(
-            'Set protocol attributes as {attrs}'.format(attrs=self.opts))
+        logger.debug('Set protocol attributes as %s', self.opts)
 
     def connection_lost(self, exc):
         """
@@ -153,6 +189,8 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         if connection interrupted.
         """
         self.conn_reset()
+        if self.file_handler:
+            self.file_handler.close()
         if exc:
             logger.error(
                 'Error on connection lost: {0}.\nTraceback: {1}'.format(
@@ -187,12 +225,35 @@ class BaseTFTPProtocol(asyncio.DatagramProtocol):
         Starts the message retry loop, resending packet to self.remote_addr
         every 'timeout'.
         """
-        self.transport.sendto(packet, self.remote_addr)
+        # DAT packets are views of buffers that are rewritten once they are
+        # acknowledged, but a transport may hold on to what it is given
+        # until the socket drains (uvloop does not copy), so hand it a copy.
+        self.transport.sendto(bytes(packet), self.remote_addr)
         self.retransmit = asyncio.get_event_loop().call_later(
             self.opts[b'timeout'], self.reply_to_client, packet)
         if self.opts[b'windowsize'] > 1:
             self.retransmits.append(self.retransmit)
 
+    def reply_batch_to_client(self, packets):
+        """
+        Sends a window of packets to self.remote_addr, handing them to the
+        kernel in a single sendmmsg call when possible, and starts the
+        message retry loop for the whole window.
+        """
+        sent = 0
+        if (self.sock_fd is not None
+                and not self.transport.get_write_buffer_size()):
+            sent = udp_batch.sendmmsg(
+                self.sock_fd, [(packet, self.remote_addr)
+                               for packet in packets])
+        # sendmmsg is done with the buffers when it returns, unlike the
+        # transport, which may queue what it is given (see reply_to_client).
+        for packet in packets[sent:]:
+            self.transport.sendto(bytes(packet), self.remote_addr)
+        self.retransmit = asyncio.get_event_loop().call_later(
+            self.opts[b'timeout'], self.reply_batch_to_client, packets)
+        self.retransmits.append(self.retransmit)
+
     def handle_err_pkt(self):
         """
         Cleans up connection after sending a courtesy error packet
@@ -264,13 +325,17 @@ class WRQProtocol(BaseTFTPProtocol):
     def __init__(self, wrq, file_handler_cls, addr, opts):
         super().__init__(wrq, file_handler_cls, addr, opts)
         logger.info('Initiating WRQProtocol with {0}'.format(self.remote_addr))
+        # bound once, these are looked up for every datagram received
+        self._from_bytes = self.packet_factory.from_bytes
+        self._reset = self.conn_timeout_reset
+        self._reply = self.reply_to_client
 
     def next_datagram(self):
         """
         Builds an acknowledgement of a received data packet.
         """
-        return self.packet_factory.create_packet(pkt_type='ACK',
-                                                 block_no=self.counter)
+        return self.packet_factory.create_packet(
+            pkt_type='ACK', block_no=self.counter).to_bytes()
 
     def initialize_transfer(self):
         self.counter = 0
@@ -282,38 +347,53 @@ class WRQProtocol(BaseTFTPProtocol):
         Check correctness of received datagram, reset timers, increment
         counter, ACKnowledge datagram, save received data to file.
         """
-        packet = self.packet_factory.from_bytes(data)
+        packet = self._from_bytes(data)
 
         if (self.is_correct_tid(addr) and packet.is_data()
                 and packet.is_correct_sequence((self.counter + 1) % 65536)):
-            self.conn_timeout_reset()
+            self._reset()
 
             self.counter = (self.counter + 1) % 65536
-            reply_packet = self.next_datagram()
-            self.reply_to_client(reply_packet.to_bytes())
+            self._reply(self.next_datagram())
 
             self.file_handler.write_chunk(packet.data)
 
-            if packet.size < self.opts[b'blksize']:
+            if self.file_handler.finished:
                 logger.info('Receiving file "{0}" from {1} completed'.format(
                     self.filename, self.remote_addr))
                 self.retransmit_reset()
                 self.transport.close()
-        else:
-            logger.debug('Data: {0}; is_data: {1}; counter: {2}'.format(
-                data, packet.is_data(), self.counter))
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Data: %s; is_data: %s; counter: %s',
+                         data, packet.is_data(), self.counter)
 
 
 class RRQProtocol(BaseTFTPProtocol):
     def __init__(self, rrq, file_handler_cls, addr, opts):
         super().__init__(rrq, file_handler_cls, addr, opts)
         logger.info('Initiating RRQProtocol with {0}'.format(self.remote_addr))
+        self._buffers = []
+        self._slot = 0
+        # bound once, these are looked up for every datagram received
+        self._from_bytes = self.packet_factory.from_bytes
+        self._reset = self.conn_timeout_reset
+        self._reply = self.reply_to_client
 
     def next_datagram(self):
-        return self.packet_factory.create_packet(
-            pkt_type='DAT',
-            block_no=self.counter,
-            data=self.file_handler.read_chunk())
+        """
+        Builds the next data packet in place, in one of up to windowsize
+        preallocated buffers, and returns a view of it. Buffers are reused
+        round-robin, so a view stays valid until windowsize more packets
+        have been built.
+        """
+        if self._slot == len(self._buffers):
+            self._buffers.append(
+                TFTPDatPacket.alloc_buffer(self.opts[b'blksize']))
+        buf = self._buffers[self._slot]
+        self._slot = (self._slot + 1) % self.opts[b'windowsize']
+
+        return TFTPDatPacket.pack_into(buf, self.counter,
+                                       self.file_handler.read_chunk())
 
     def initialize_transfer(self):
         self.counter = 1
@@ -330,22 +410,22 @@ class RRQProtocol(BaseTFTPProtocol):
         increments message counter, send next chunk of requested file
         to client. Works only for windowsize=1 (default value)
         """
-        packet = self.packet_factory.from_bytes(data)
-        if (self.is_correct_tid(addr) and packet.is_err()):
+        packet = self._from_bytes(data)
+        correct_tid = self.is_correct_tid(addr)
+        if correct_tid and packet.is_err():
             self.handle_err_pkt()
             return
-        if (self.is_correct_tid(addr) and packet.is_ack()
+        if (correct_tid and packet.is_ack()
                 and packet.is_correct_sequence(self.counter)):
-            self.conn_timeout_reset()
+            self._reset()
             if self.file_handler.finished:
                 self.transport.close()
                 return
             self.counter = (self.counter + 1) % 65536
-            packet = self.next_datagram()
-            self.reply_to_client(packet.to_bytes())
-        else:
-            logger.debug('Ack: {0}; is_ack: {1}; counter: {2}'.format(
-                data, packet.is_ack(), self.counter))
+            self._reply(self.next_datagram())
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Ack: %s; is_ack: %s; counter: %s',
+                         data, packet.is_ack(), self.counter)
 
     def is_packet_inside_window(self, packet, windowsize):
         return ((packet.block_no > (self.counter - windowsize))
@@ -357,13 +437,14 @@ class RRQProtocol(BaseTFTPProtocol):
         increments message counter, send next chunk of requested file
         to client, and according to the agreed windowsize.
         """
-        packet = self.packet_factory.from_bytes(data)
-        if (self.is_correct_tid(addr) and packet.is_err()):
+        packet = self._from_bytes(data)
+        correct_tid = self.is_correct_tid(addr)
+        if correct_tid and packet.is_err():
             self.handle_err_pkt()
             return
-        if (self.is_correct_tid(addr) and packet.is_ack()
+        if (correct_tid and packet.is_ack()
                 and self.is_packet_inside_window(packet, windowsize)):
-            self.conn_timeout_reset()
+            self._reset()
             if packet.is_correct_sequence(self.counter):
                 if self.file_handler.finished:  # ACK of last package arrived
                     self.transport.close()
@@ -382,13 +463,11 @@ class RRQProtocol(BaseTFTPProtocol):
                 # self.packets always contains at most windowsize items
                 self.packets.pop(0)  # discard old packets
                 self.counter = (self.counter + 1) % 65536
-                packet = self.next_datagram()
-                self.packets.append(packet)
-            for packet in self.packets:
-                self.reply_to_client(packet.to_bytes())
-        else:
-            logger.debug('Ack: {0}; is_ack: {1}; counter: {2}'.format(
-                data, packet.is_ack(), self.counter))
+                self.packets.append(self.next_datagram())
+            self.reply_batch_to_client(list(self.packets))
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Ack: %s; is_ack: %s; counter: %s',
+                         data, packet.is_ack(), self.counter)
 
     def datagram_received(self, data, addr):
         """
@@ -428,13 +507,17 @@ class BaseTFTPServerProtocol(asyncio.DatagramProtocol):
     def connection_made(self, transport):
         logger.info('Listening...')
         self.transport = transport
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            set_socket_buffers(sock, self.extra_opts.get(b'rcvbuf'),
+                               self.extra_opts.get(b'sndbuf'))
 
     def datagram_received(self, data, addr):
         """
         Opens a read or write connection to remote host by scheduling
         an asyncio.Protocol.
         """
-        logger.debug('received: {}'.format(data.decode()))
+        logger.debug('received: %s', data)
 
         first_packet = self.packet_factory.from_bytes(data)
         protocol = self.select_protocol(first_packet)
@@ -455,7 +538,7 @@ class BaseTFTPServerProtocol(asyncio.DatagramProtocol):
 
 class TFTPServerProtocol(BaseTFTPServerProtocol):
     def select_protocol(self, packet):
-        logger.debug('packet type: {}'.format(packet.pkt_type))
+        logger.debug('packet type: %s', packet.pkt_type)
         if packet.is_rrq():
             return RRQProtocol
         elif packet.is_wrq():
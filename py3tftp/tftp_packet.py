@@ -1,3 +1,5 @@
+import struct
+
 from py3tftp import tftp_parsing
 from py3tftp.exceptions import BadPacketType
 
@@ -23,12 +25,19 @@ class TFTPPacketFactory(object):
 
     def from_bytes(self, data):
         try:
-            pkt_type = BaseTFTPPacket.pkt_types[data[:2]].upper()
-        except KeyError:
+            pkt_type = BaseTFTPPacket.opcodes[_short.unpack_from(data)[0]]
+        except (KeyError, struct.error):
             raise BadPacketType(
                 'Cannot create packet from raw bytes, unknown packet type.')
 
-        if pkt_type in ('RRQ', 'WRQ'):
+        # ACKs and DATs make up nearly all of the traffic, so check them
+        # first and build them without going through create_packet.
+        if pkt_type == 'ACK':
+            return TFTPAckPacket(block_no=self._unpack_header_short(data))
+        elif pkt_type == 'DAT':
+            return TFTPDatPacket(block_no=self._unpack_header_short(data),
+                                 data=memoryview(data)[4:])
+        elif pkt_type in ('RRQ', 'WRQ'):
             fname, mode, r_opts = tftp_parsing.validate_req(
                 *tftp_parsing.parse_req(data[2:]),
                 supported_opts=self.supported_opts,
@@ -38,17 +47,6 @@ class TFTPPacketFactory(object):
                 fname=fname,
                 mode=mode,
                 r_opts=r_opts)
-        elif pkt_type == 'DAT':
-            block_no = BaseTFTPPacket.unpack_short(data[2:4])
-            return self.create_packet(
-                pkt_type=pkt_type,
-                block_no=block_no,
-                data=data[4:])
-        elif pkt_type == 'ACK':
-            block_no = BaseTFTPPacket.unpack_short(data[2:4])
-            return self.create_packet(
-                pkt_type=pkt_type,
-                block_no=block_no)
         elif pkt_type == 'OCK':
             _, _, r_opts = tftp_parsing.validate_req(
                 *tftp_parsing.parse_req(data[2:]),
@@ -56,10 +54,21 @@ class TFTPPacketFactory(object):
                 default_opts=self.default_opts)
             return self.create_packet(pkt_type=pkt_type, opts=r_opts)
         elif pkt_type == 'ERR':
-            code = BaseTFTPPacket.unpack_short(data[2:4])
+            code = self._unpack_header_short(data)
             msg = data[4:]
             return self.create_packet(pkt_type, code=code, msg=msg)
 
+    @staticmethod
+    def _unpack_header_short(data):
+        """
+        Reads the block number or error code that follows the opcode.
+        """
+        try:
+            return _short.unpack_from(data, 2)[0]
+        except struct.error:
+            raise BadPacketType(
+                'Cannot create packet from raw bytes, packet too short.')
+
     @classmethod
     def err_file_exists(cls):
         return cls.create_packet('ERR', code=6, msg='File already exists')
@@ -77,7 +86,12 @@ class TFTPPacketFactory(object):
         return cls.create_packet('ERR', code=5, msg='Unknown transfer id')
 
 
+_short = struct.Struct('>H')
+
+
 class BaseTFTPPacket(object):
+    __slots__ = ('pkt_type', '_bytes_cache')
+
     pkt_types = {
         b'\x00\x01': 'RRQ',
         b'\x00\x02': 'WRQ',
@@ -93,6 +107,8 @@ class BaseTFTPPacket(object):
         'OCK': b'\x00\x06',
     }
 
+    opcodes = {1: 'RRQ', 2: 'WRQ', 3: 'DAT', 4: 'ACK', 5: 'ERR', 6: 'OCK'}
+
     def __init__(self):
         self.pkt_type = None
         self._bytes_cache = None
@@ -170,6 +186,8 @@ def text_to_bytes(string):
 
 
 class TFTPRequestPacket(BaseTFTPPacket):
+    __slots__ = ('fname', 'mode', 'r_opts')
+
     def __init__(self, pkt_type, **kwargs):
         super().__init__()
         self.pkt_type = pkt_type.upper()
@@ -186,6 +204,8 @@ class TFTPRequestPacket(BaseTFTPPacket):
 
 
 class TFTPAckPacket(BaseTFTPPacket):
+    __slots__ = ('block_no',)
+
     def __init__(self, **kwargs):
         super().__init__()
         self.pkt_type = 'ACK'
@@ -197,6 +217,8 @@ class TFTPAckPacket(BaseTFTPPacket):
 
 
 class TFTPDatPacket(BaseTFTPPacket):
+    __slots__ = ('block_no', 'data')
+
     def __init__(self, **kwargs):
         super().__init__()
         self.pkt_type = 'DAT'
@@ -209,8 +231,31 @@ class TFTPDatPacket(BaseTFTPPacket):
                          BaseTFTPPacket.pack_short(self.block_no),
                          self.data])
 
+    @classmethod
+    def alloc_buffer(cls, blksize):
+        """
+        Returns a writable buffer for building DAT packets carrying up to
+        blksize bytes of data in place, with the opcode already filled in.
+        """
+        buf = memoryview(bytearray(blksize + 4))
+        buf[:2] = cls.pkt_types['DAT']
+        return buf
+
+    @classmethod
+    def pack_into(cls, buf, block_no, data):
+        """
+        Serializes a DAT packet into a buffer from alloc_buffer and returns
+        a view of the serialized bytes.
+        """
+        end = 4 + len(data)
+        _short.pack_into(buf, 2, block_no)
+        buf[4:end] = data
+        return buf[:end]
+
 
 class TFTPOckPacket(BaseTFTPPacket):
+    __slots__ = ('options',)
+
     def __init__(self, **kwargs):
         super().__init__()
         self.pkt_type = 'OCK'
@@ -223,6 +268,8 @@ class TFTPOckPacket(BaseTFTPPacket):
 
 
 class TFTPErrPacket(BaseTFTPPacket):
+    __slots__ = ('code', 'msg')
+
     def __init__(self, **kwargs):
         super().__init__()
         self.pkt_type = 'ERR'
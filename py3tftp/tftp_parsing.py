@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 
 from py3tftp.exceptions import BadRequest, UnacknowledgedOption
 
@@ -11,6 +12,11 @@ as well as parse filenames.
 
 logger = logging.getLogger(__name__)
 
+# Clients tend to negotiate the same handful of option values over and
+# over (eg. every PXE client booting the same image), so validated values
+# are memoized. Rejected values raise and are therefore never cached.
+_OPTION_CACHE_SIZE = 64
+
 
 def validate_req(fname, mode, opts, supported_opts=None, default_opts=None):
     """
@@ -26,16 +32,15 @@ def validate_req(fname, mode, opts, supported_opts=None, default_opts=None):
 
     for option, value in opts.items():
         logger.debug(option)
-        if option in supported_opts.keys():
-            logger.debug(option)
+        if option in supported_opts:
             try:
                 acknowledged_options[option] = supported_opts[option](value)
             except UnacknowledgedOption as e:
                 logger.debug(e)
             except ValueError:
                 logger.debug(
-                    ('Client passed malformed option "{0}": "{1}", '
-                     'ignoring').format(option, value))
+                    'Client passed malformed option "%s": "%s", ignoring',
+                    option, value)
 
     return (fname.decode(encoding='ascii'), mode, acknowledged_options)
 
@@ -46,7 +51,7 @@ def parse_req(req):
     'filename\x00mode\x00opt1\x00val1\x00optN\x00valN\x00' into a
     filename, a mode, and a dictionary of option:values.
     """
-    logger.debug("Request: {}".format(req))
+    logger.debug('Request: %s', req)
     try:
         fname, mode, *opts = [item for item in req.split(b'\x00') if item]
     except ValueError:
@@ -55,6 +60,7 @@ def parse_req(req):
     return fname, mode, options
 
 
+@lru_cache(maxsize=_OPTION_CACHE_SIZE)
 def blksize_parser(val, lower_bound=8, upper_bound=65464):
     """
     Parses and validates the 'blksize' option against the RFC 2348.
@@ -70,6 +76,7 @@ def blksize_parser(val, lower_bound=8, upper_bound=65464):
         return value
 
 
+@lru_cache(maxsize=_OPTION_CACHE_SIZE)
 def timeout_parser(val, lower_bound=1, upper_bound=255):
     """
     Parses and validates the 'timeout' option against RFC 2349.
@@ -89,6 +96,7 @@ def tsize_parser(val, lower_bound=0, upper_bound=None):
     return value
 
 
+@lru_cache(maxsize=_OPTION_CACHE_SIZE)
 def windowsize_parser(val, lower_bound=1, upper_bound=65535):
     """
     Parses and validates the 'windowsize' option against the RFC 7440.
@@ -0,0 +1,120 @@
+"""
+This module wraps the Linux sendmmsg(2) syscall with ctypes, so that a
+batch of datagrams can be handed to the kernel with a single syscall.
+"""
+import ctypes
+import socket
+import struct
+import sys
+
+
+MAX_BATCH = 64
+
+
+class IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(IOVec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', MsgHdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(MMsgHdr),
+                     ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+available = _sendmmsg is not None
+
+
+def pack_sockaddr(addr):
+    """
+    Builds a sockaddr_in or sockaddr_in6 out of an address tuple as
+    returned by asyncio, ie. (host, port) or (host, port, flow, scope).
+    """
+    if len(addr) == 2:
+        host, port = addr
+        return b''.join([struct.pack('=H', socket.AF_INET),
+                         struct.pack('!H', port),
+                         socket.inet_pton(socket.AF_INET, host),
+                         bytes(8)])
+    host, port, flowinfo, scope_id = addr
+    return b''.join([struct.pack('=H', socket.AF_INET6),
+                     struct.pack('!HI', port, flowinfo),
+                     socket.inet_pton(socket.AF_INET6, host),
+                     struct.pack('=I', scope_id)])
+
+
+def _buffer_of(data):
+    """
+    Returns a ctypes object sharing memory with data, copying only
+    read-only buffers other than bytes.
+    """
+    if isinstance(data, bytes):
+        return ctypes.c_char_p(data)
+    try:
+        return (ctypes.c_char * len(data)).from_buffer(data)
+    except TypeError:
+        return ctypes.c_char_p(bytes(data))
+
+
+def sendmmsg(sock_fd, datagrams):
+    """
+    Sends a list of (data, addr) pairs through the socket sock_fd,
+    MAX_BATCH at a time. Returns how many datagrams the kernel accepted;
+    the caller is expected to send the rest through the regular path.
+    """
+    sent = 0
+    while sent < len(datagrams):
+        batch = datagrams[sent:sent + MAX_BATCH]
+        count = len(batch)
+        msgs = (MMsgHdr * count)()
+        iovs = (IOVec * count)()
+        keep_alive = []
+
+        for i, (data, addr) in enumerate(batch):
+            buf = _buffer_of(data)
+            sockaddr = pack_sockaddr(addr)
+            name = ctypes.create_string_buffer(sockaddr, len(sockaddr))
+            keep_alive.append((buf, name))
+
+            iovs[i].iov_base = ctypes.cast(buf, ctypes.c_void_p)
+            iovs[i].iov_len = len(data)
+            hdr = msgs[i].msg_hdr
+            hdr.msg_name = ctypes.cast(name, ctypes.c_void_p)
+            hdr.msg_namelen = len(sockaddr)
+            hdr.msg_iov = ctypes.pointer(iovs[i])
+            hdr.msg_iovlen = 1
+
+        result = _sendmmsg(sock_fd, msgs, count, 0)
+        if result <= 0:
+            # Socket buffer is full (EAGAIN) or the send failed; let the
+            # transport deal with what is left.
+            break
+        sent += result
+        if result < count:
+            break
+
+    return sent
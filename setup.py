@@ -26,6 +26,9 @@ setup(
     keywords='async asynchronous tftp',
     packages=['py3tftp'],
     include_package_data=True,
+    extras_require={
+        'uvloop': ['uvloop'],
+    },
     entry_points={
         'console_scripts': [
             'py3tftp = py3tftp.__main__:main'
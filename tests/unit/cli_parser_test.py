@@ -0,0 +1,36 @@
+import os
+import socket
+import unittest as t
+from unittest.mock import patch
+
+from py3tftp.cli_parser import parse_cli_arguments
+
+
+def parse(*argv):
+    with patch('sys.argv', ['py3tftp'] + list(argv)):
+        return parse_cli_arguments()
+
+
+class TestWorkersOption(t.TestCase):
+    def test_defaults_to_one_worker(self):
+        self.assertEqual(parse().workers, 1)
+
+    @t.skipUnless(hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT'),
+                  'fork() and SO_REUSEPORT are not available')
+    def test_several_workers(self):
+        self.assertEqual(parse('--workers', '3').workers, 3)
+
+    @patch('sys.stderr')
+    def test_rejects_less_than_one_worker(self, stderr):
+        with self.assertRaises(SystemExit):
+            parse('--workers', '0')
+
+    @patch('sys.stderr')
+    @patch('py3tftp.cli_parser.socket', spec=[])
+    def test_several_workers_require_reuseport(self, socket_mod, stderr):
+        with self.assertRaises(SystemExit):
+            parse('-w', '2')
+
+    @patch('py3tftp.cli_parser.socket', spec=[])
+    def test_single_worker_needs_no_reuseport(self, socket_mod):
+        self.assertEqual(parse('-w', '1').workers, 1)
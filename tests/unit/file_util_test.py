@@ -34,11 +34,69 @@ class FileReaderTest(t.TestCase):
 
         self.assertTrue(self.reader.finished)
 
+    def test_chunks_share_backing_buffer(self):
+        first = self.reader.read_chunk(4)
+        second = self.reader.read_chunk(4)
+
+        self.assertIs(first.obj, second.obj)
+
+        with open(self.filename, 'rb') as f:
+            f.read(4)
+            self.assertEqual(f.read(4), second)
+
+    def test_file_truncated_while_reading(self):
+        with open('TRUNCATED_FILE', 'wb') as f:
+            f.write(b'x' * 1024 * 1024)
+        self.addCleanup(os.unlink, 'TRUNCATED_FILE')
+        reader = FileReader(b'TRUNCATED_FILE', 512)
+        self.assertEqual(512, len(reader.read_chunk()))
+
+        with open('TRUNCATED_FILE', 'wb') as f:
+            f.write(b'short')
+
+        self.assertEqual(b'', reader.read_chunk())
+        self.assertTrue(reader.finished)
+
+    def test_reads_netascii(self):
+        reader = FileReader(self.filename, 512, b'netascii')
+        data = BytesIO()
+        while not reader.finished:
+            data.write(reader.read_chunk())
+
+        with open(self.filename, 'rb') as f:
+            expected = f.read().replace(b'\r', b'\r\x00')
+            expected = expected.replace(b'\n', b'\r\n')
+        self.assertEqual(expected, data.getvalue())
+
+    def test_reads_empty_file(self):
+        open('EMPTY_FILE', 'wb').close()
+        self.addCleanup(os.unlink, 'EMPTY_FILE')
+        reader = FileReader(b'EMPTY_FILE', 512)
+
+        self.assertEqual(b'', reader.read_chunk())
+        self.assertTrue(reader.finished)
+
+    def test_block_aligned_file_ends_with_empty_chunk(self):
+        with open('ALIGNED_FILE', 'wb') as f:
+            f.write(b'x' * 1024)
+        self.addCleanup(os.unlink, 'ALIGNED_FILE')
+        reader = FileReader(b'ALIGNED_FILE', 512)
+
+        self.assertEqual(512, len(reader.read_chunk()))
+        self.assertEqual(512, len(reader.read_chunk()))
+        self.assertFalse(reader.finished)
+        self.assertEqual(b'', reader.read_chunk())
+        self.assertTrue(reader.finished)
+
     def test_raises_doesnt_exist_exc(self):
         with self.assertRaises(FileNotFoundError):
             reader = FileReader(b'DOESNT_EXIST')
             reader.read_chunk()
 
+    def test_file_size(self):
+        self.assertEqual(self.reader.file_size(),
+                         os.path.getsize(self.filename))
+
     def test_fd_closed_after_reading(self):
         fd = self.reader._f.fileno()
         self.reader.read_chunk(2048)
@@ -67,6 +125,13 @@ class FileWriterTest(t.TestCase):
         with open(self.filename, 'rb') as f:
             self.assertEqual(self.msg, f.read())
 
+    def test_finished_after_short_chunk(self):
+        self.writer.write_chunk(self.msg)
+        self.assertFalse(self.writer.finished)
+
+        self.writer.write_chunk(self.msg[:2])
+        self.assertTrue(self.writer.finished)
+
     def test_write_chunk_returns_no_bytes_written(self):
         bytes_written = self.writer.write_chunk(self.msg)
         self.assertEqual(len(self.msg), bytes_written)
@@ -93,8 +158,7 @@ class FileWriterTest(t.TestCase):
 class TestSanitizeFname(t.TestCase):
     @classmethod
     def setUpClass(cls):
-        from pathlib import Path
-        cls.target_dir = Path.cwd() / 'tmp/testfile'
+        cls.target_dir = os.path.join(os.getcwd(), 'tmp', 'testfile')
 
     def test_under_root_dir(self):
         fname = b'/tmp/testfile'
@@ -103,3 +167,17 @@ class TestSanitizeFname(t.TestCase):
     def test_dir_traversal(self):
         fname = b'../../../../../../tmp/testfile'
         self.assertEqual(sanitize_fname(fname), self.target_dir)
+
+    def test_nested_dir_traversal(self):
+        fname = b'tmp/../../../etc/passwd'
+        with self.assertRaises(FileNotFoundError):
+            sanitize_fname(fname)
+
+    def test_sibling_dir_with_same_prefix(self):
+        sibling = os.path.basename(os.getcwd()) + '-sibling'
+        fname = os.fsencode('tmp/../../' + sibling + '/testfile')
+        with self.assertRaises(FileNotFoundError):
+            sanitize_fname(fname)
+
+    def test_cwd_itself(self):
+        self.assertEqual(sanitize_fname(b'./'), os.getcwd())
@@ -0,0 +1,23 @@
+import os
+import unittest as t
+from unittest.mock import MagicMock
+
+from py3tftp.__main__ import watch_parent
+
+
+class TestWatchParent(t.TestCase):
+    def setUp(self):
+        self.loop = MagicMock()
+
+    def test_reschedules_while_parent_alive(self):
+        watch_parent(self.loop, os.getppid(), 2.0)
+
+        self.loop.stop.assert_not_called()
+        self.loop.call_later.assert_called_once_with(
+            2.0, watch_parent, self.loop, os.getppid(), 2.0)
+
+    def test_stops_loop_once_parent_is_gone(self):
+        watch_parent(self.loop, -1)
+
+        self.loop.stop.assert_called_once_with()
+        self.loop.call_later.assert_not_called()
@@ -39,3 +39,17 @@ class NetasciiTest(t.TestCase):
                     chunk = netascii[i:i+blksize]
                     writer.write(chunk)
                 self.assertEqual(octet, octet_buffer.getvalue())
+
+    def test_netascii_writer_accepts_memoryview(self):
+        octet_buffer = io.BytesIO()
+        writer = Netascii(octet_buffer)
+        writer.write(memoryview(b'te\r\nst\r\x00'))
+        self.assertEqual(b'te\nst\r', octet_buffer.getvalue())
+
+    def test_netascii_writer_cr_on_memoryview_block_boundary(self):
+        octet_buffer = io.BytesIO()
+        writer = Netascii(octet_buffer)
+        packet = memoryview(b'\x00\x03\x00\x01ab\r\x00\x03\x00\x02\ncd')
+        writer.write(packet[4:7])
+        writer.write(packet[11:])
+        self.assertEqual(b'ab\ncd', octet_buffer.getvalue())
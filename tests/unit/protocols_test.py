@@ -1,6 +1,10 @@
+import os
+import socket
+import tempfile
 import unittest as t
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
 
+from py3tftp import protocols
 from py3tftp.protocols import (RRQProtocol, TFTPServerProtocol, WRQProtocol)
 from py3tftp.tftp_packet import TFTPPacketFactory
 
@@ -25,6 +29,19 @@ class TestTFTPServerProtocol(t.TestCase):
         klass = self.protocol.select_protocol(request_packet_mock)
         self.assertTrue(klass == WRQProtocol)
 
+    def test_connection_made_sets_socket_buffers(self):
+        proto = TFTPServerProtocol('127.0.0.1', None,
+                                   {b'rcvbuf': 4096, b'sndbuf': 8192})
+        sock = MagicMock()
+        transport = MagicMock()
+        transport.get_extra_info.return_value = sock
+
+        proto.connection_made(transport)
+
+        sock.setsockopt.assert_has_calls([
+            call(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096),
+            call(socket.SOL_SOCKET, socket.SO_SNDBUF, 8192)])
+
     def test_datagram_received(self):
         data = b'\x00\x01TEST\x00binary\x00'
         mock_loop = MagicMock()
@@ -38,6 +55,57 @@ class TestTFTPServerProtocol(t.TestCase):
         mock_loop.create_task.assert_called_with(('endpoint',))
 
 
+LEASES = """
+lease 10.0.0.5 {
+  starts 4 2026/10/01 00:00:00;
+  ends 4 2026/10/30 00:00:00;
+  binding state active;
+  hardware ethernet 00:11:22:33:44:55;
+  option agent.circuit-id "01:02:61:62";
+}
+lease 10.0.0.6 {
+  starts 4 2026/10/01 00:00:00;
+  ends 4 2026/10/30 00:00:00;
+  binding state active;
+  hardware ethernet 00:11:22:33:44:66;
+}
+"""
+
+
+class TestHijackFname(t.TestCase):
+    def setUp(self):
+        fd, self.lease_path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write(LEASES)
+        patcher = patch.object(protocols, 'LEASE_PATH', self.lease_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(os.unlink, self.lease_path)
+        protocols._LEASE_CACHE.update(mtime=None, by_ip={})
+
+    def hijack(self, ip):
+        rrq = RRQ + b'\x00filename1\x00octet\x00'
+        proto = RRQProtocol(rrq, MagicMock, (ip, 9999,), {})
+        return proto.hijack_fname(b'filename1')
+
+    def test_client_with_circuit_id(self):
+        self.assertEqual(self.hijack('10.0.0.5'), b'"01:02:61:62".cfg')
+
+    def test_client_without_circuit_id(self):
+        self.assertEqual(self.hijack('10.0.0.6'), b'filename1')
+
+    def test_leases_parsed_once(self):
+        with patch.object(protocols, 'DhcpLeases',
+                          wraps=protocols.DhcpLeases) as leases:
+            self.hijack('10.0.0.5')
+            self.hijack('10.0.0.6')
+        self.assertEqual(leases.call_count, 1)
+
+    def test_missing_leases_file(self):
+        with patch.object(protocols, 'LEASE_PATH', self.lease_path + '.gone'):
+            self.assertEqual(self.hijack('10.0.0.5'), b'filename1')
+
+
 class TestWRQProtocol(t.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -67,6 +135,13 @@ class TestWRQProtocol(t.TestCase):
 
         self.assertTrue(self.proto.transport.close.called)
 
+    def test_transport_open_until_file_finished(self):
+        self.proto.file_handler.finished = False
+        data = DAT + b'\x00\x0BAAAA'
+        self.proto.datagram_received(data, self.addr)
+
+        self.assertFalse(self.proto.transport.close.called)
+
     def test_correct_packet_received_and_saved(self):
         data = DAT + b'\x00\x0BAAAA'
         self.proto.datagram_received(data, self.addr)
@@ -124,11 +199,32 @@ class TestRRQProtocol(t.TestCase):
         self.proto.handle_err_pkt = MagicMock()
         self.proto.counter = 10
         self.proto.transport = MagicMock()
+        self.sent = self.proto.transport.sendto
 
     def test_get_next_chunk_of_data(self):
         rsp = self.proto.next_datagram()
 
-        self.assertEqual(rsp.to_bytes(), DAT + b'\x00\x0aAAAA')
+        self.assertEqual(rsp, DAT + b'\x00\x0aAAAA')
+
+    def test_window_datagrams_use_separate_buffers(self):
+        self.proto.opts[b'windowsize'] = 2
+        self.proto.file_handler.read_chunk.side_effect = [b'AAAA', b'BBBB']
+        rsp1 = self.proto.next_datagram()
+        self.proto.counter += 1
+        rsp2 = self.proto.next_datagram()
+
+        self.assertEqual(rsp1, DAT + b'\x00\x0aAAAA')
+        self.assertEqual(rsp2, DAT + b'\x00\x0bBBBB')
+
+    def test_transport_gets_copies_of_reused_buffers(self):
+        self.proto.file_handler.finished = False
+        self.proto.datagram_received(ACK + b'\x00\x0a', self.addr)
+        self.proto.opts[b'windowsize'] = 2
+        self.proto.packets = [None, None]
+        self.proto.datagram_received(ACK + b'\x00\x0b', self.addr)
+
+        for args, _ in self.sent.call_args_list:
+            self.assertIsInstance(args[0], bytes)
 
     def test_get_sequence_of_chunks(self):
         self.proto.file_handler.finished = False
@@ -141,7 +237,7 @@ class TestRRQProtocol(t.TestCase):
         self.proto.datagram_received(ack2, self.addr)
 
         calls = [call(dat1, self.addr), call(dat2, self.addr)]
-        self.proto.transport.sendto.assert_has_calls(calls)
+        self.sent.assert_has_calls(calls)
 
     def test_get_next_window_of_data(self):
         self.proto.file_handler.finished = False
@@ -154,7 +250,7 @@ class TestRRQProtocol(t.TestCase):
         self.proto.datagram_received(ack1, self.addr)
 
         calls = [call(dat1, self.addr), call(dat2, self.addr)]
-        self.proto.transport.sendto.assert_has_calls(calls)
+        self.sent.assert_has_calls(calls)
 
     def test_get_sequence_of_windows(self):
         self.proto.file_handler.finished = False
@@ -171,7 +267,7 @@ class TestRRQProtocol(t.TestCase):
         self.proto.datagram_received(ack2, self.addr)
         calls = [call(dat1, self.addr), call(dat2, self.addr),
                  call(dat3, self.addr), call(dat4, self.addr)]
-        self.proto.transport.sendto.assert_has_calls(calls)
+        self.sent.assert_has_calls(calls)
 
     def test_send_last_packet(self):
         self.proto.file_handler.read_chunk = MagicMock(return_value=b'AA')
@@ -231,7 +327,7 @@ class TestRRQProtocol(t.TestCase):
 
         calls = [call(dat1, self.addr), call(dat2, self.addr),
                  call(dat2, self.addr), call(dat3, self.addr)]
-        self.proto.transport.sendto.assert_has_calls(calls)
+        self.sent.assert_has_calls(calls)
 
     def test_roll_over(self):
         self.proto.file_handler.finished = False
@@ -245,7 +341,7 @@ class TestRRQProtocol(t.TestCase):
         self.proto.datagram_received(ack2, self.addr)
 
         calls = [call(dat1, self.addr), call(dat2, self.addr)]
-        self.proto.transport.sendto.assert_has_calls(calls)
+        self.sent.assert_has_calls(calls)
 
     def test_err_received(self):
         err = ERR + b'\x00TFTP Aborted.\x00'
@@ -72,6 +72,12 @@ class TestTFTPPacketService(t.TestCase):
             self.packet_factory.from_bytes(
                 b'\x00\x00\x00blksize\x00512\x00')
 
+    def test_from_bytes_truncated_packet(self):
+        with self.assertRaises(BadPacketType):
+            self.packet_factory.from_bytes(b'\x00')
+        with self.assertRaises(BadPacketType):
+            self.packet_factory.from_bytes(b'\x00\x04\x00')
+
     def test_create_packet_bad_packet_type_raises_exc(self):
         with self.assertRaises(BadPacketType):
             self.packet_factory.create_packet(pkt_type='WAT')
@@ -158,6 +164,12 @@ class TestTFTPDatPacket(t.TestCase):
         serialized = packet.to_bytes()
         self.assertEqual(serialized, b'\x00\x03\x00\x19a lot of data')
 
+    def test_pack_into_buffer(self):
+        buf = TFTPDatPacket.alloc_buffer(16)
+        TFTPDatPacket.pack_into(buf, 1, b'first block')
+        serialized = TFTPDatPacket.pack_into(buf, 25, b'data')
+        self.assertEqual(serialized, b'\x00\x03\x00\x19data')
+
 
 class TestTFTPAckPacket(t.TestCase):
     def test_ack(self):
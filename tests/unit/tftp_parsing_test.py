@@ -45,6 +45,18 @@ class TestBlksizeParser(t.TestCase):
         with self.assertRaises(ValueError):
             blksize_parser(val)
 
+    def test_repeated_values_are_memoized(self):
+        blksize_parser.cache_clear()
+        blksize_parser(b'1428')
+        blksize_parser(b'1428')
+        with self.assertRaises(UnacknowledgedOption):
+            blksize_parser(b'4')
+        with self.assertRaises(UnacknowledgedOption):
+            blksize_parser(b'4')
+
+        info = blksize_parser.cache_info()
+        self.assertEqual((info.hits, info.currsize), (1, 1))
+
 
 class TestWindowsizeParser(t.TestCase):
     def test_lower_bound(self):
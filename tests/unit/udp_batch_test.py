@@ -0,0 +1,43 @@
+import socket
+import unittest as t
+
+from py3tftp import udp_batch
+
+
+@t.skipUnless(udp_batch.available, 'sendmmsg is not available')
+class TestSendmmsg(t.TestCase):
+    def setUp(self):
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(('127.0.0.1', 0))
+        self.receiver.settimeout(1)
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addr = self.receiver.getsockname()
+
+    def tearDown(self):
+        self.receiver.close()
+        self.sender.close()
+
+    def test_sends_all_datagrams(self):
+        buf = bytearray(b'\x00\x03\x00\x01AAAA')
+        datagrams = [(b'first', self.addr),
+                     (memoryview(buf)[4:], self.addr),
+                     (b'', self.addr)]
+
+        sent = udp_batch.sendmmsg(self.sender.fileno(), datagrams)
+
+        self.assertEqual(sent, 3)
+        received = [self.receiver.recv(16) for _ in range(3)]
+        self.assertEqual(received, [b'first', b'AAAA', b''])
+
+
+class TestPackSockaddr(t.TestCase):
+    def test_ipv4(self):
+        sockaddr = udp_batch.pack_sockaddr(('127.0.0.1', 69))
+        self.assertEqual(len(sockaddr), 16)
+        self.assertEqual(sockaddr[2:8], b'\x00\x45\x7f\x00\x00\x01')
+
+    def test_ipv6(self):
+        sockaddr = udp_batch.pack_sockaddr(('::1', 69, 0, 0))
+        self.assertEqual(len(sockaddr), 28)
+        self.assertEqual(sockaddr[2:4], b'\x00\x45')
+        self.assertEqual(sockaddr[8:24], bytes(15) + b'\x01')